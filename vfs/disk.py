@@ -1,16 +1,48 @@
+import base64
+import json
 import pickle
-from typing import Optional, List
+from array import array
+from typing import Optional, List, Union
 from superblock import SuperBlock
 from inode import Inode
 
 
+def is_legacy_image(filename: str) -> bool:
+    """Return True if filename holds a pickled image from before the JSON format."""
+    with open(filename, 'rb') as f:
+        return f.read(1) == b'\x80'  # pickle PROTO opcode
+
+
+class _LegacyRecord:
+    """Attribute holder standing in for SuperBlock/Inode objects in old images."""
+    pass
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Unpickler that only admits the classes stored by old images."""
+
+    ALLOWED = {("superblock", "SuperBlock"), ("inode", "Inode")}
+
+    def find_class(self, module: str, name: str):
+        if (module, name) in self.ALLOWED:
+            return _LegacyRecord
+        raise pickle.UnpicklingError(f"Unexpected object in legacy image: {module}.{name}")
+
+
 class Disk:
     """Simulates disk storage for inodes and data blocks."""
     
     def __init__(self, superblock: SuperBlock):
         self.superblock = superblock
         self.inodes: List[Optional[Inode]] = [None] * superblock.max_inodes
-        self.blocks: List[str] = [""] * superblock.max_blocks
+        self._init_blocks()
+
+    def _init_blocks(self) -> None:
+        """Allocate the contiguous block buffer and per-block used lengths."""
+        sb = self.superblock
+        self._buf = bytearray(sb.max_blocks * sb.block_size)
+        self._view = memoryview(self._buf)
+        self._blen = array('I', [0]) * sb.max_blocks
 
     def read_inode(self, inode_id: int) -> Optional[Inode]:
         """Read an inode from disk."""
@@ -24,33 +56,137 @@ class Disk:
             raise IndexError(f"Invalid inode ID: {inode_id}")
         self.inodes[inode_id] = inode
 
-    def read_block(self, block_id: int) -> str:
+    def read_block(self, block_id: int) -> bytes:
         """Read a data block from disk."""
         if not 0 <= block_id < self.superblock.max_blocks:
             raise IndexError(f"Invalid block ID: {block_id}")
-        return self.blocks[block_id]
+        off = block_id * self.superblock.block_size
+        return bytes(self._view[off:off + self._blen[block_id]])
 
-    def write_block(self, block_id: int, data: str) -> None:
+    def write_block(self, block_id: int, data: bytes) -> None:
         """Write a data block to disk."""
         if not 0 <= block_id < self.superblock.max_blocks:
             raise IndexError(f"Invalid block ID: {block_id}")
         if len(data) > self.superblock.block_size:
             raise ValueError(f"Data exceeds block size ({self.superblock.block_size})")
-        self.blocks[block_id] = data
+        off = block_id * self.superblock.block_size
+        self._buf[off:off + len(data)] = data
+        self._blen[block_id] = len(data)
+    
+    def write_blocks(self, block_ids: List[int], data: bytes) -> None:
+        """Write data across the given blocks, one block-sized chunk per block."""
+        bs = self.superblock.block_size
+        max_blocks = self.superblock.max_blocks
+        if len(data) > len(block_ids) * bs:
+            raise ValueError(f"Data exceeds {len(block_ids)} blocks of size {bs}")
+
+        src = memoryview(data)
+        buf = self._buf
+        blen = self._blen
+        n = len(block_ids)
+
+        # Fast path: a run of consecutive blocks that the data fills up to the
+        # last one is a single copy into the buffer
+        if n and (n - 1) * bs < len(data):
+            first = block_ids[0]
+            if 0 <= first and first + n <= max_blocks and block_ids == list(range(first, first + n)):
+                buf[first * bs:first * bs + len(data)] = src
+                blen[first:first + n] = array('I', [bs]) * n
+                blen[first + n - 1] = len(data) - (n - 1) * bs
+                return
+
+        for k, block_id in enumerate(block_ids):
+            if not 0 <= block_id < max_blocks:
+                raise IndexError(f"Invalid block ID: {block_id}")
+            chunk = src[k * bs:(k + 1) * bs]
+            off = block_id * bs
+            buf[off:off + len(chunk)] = chunk
+            blen[block_id] = len(chunk)
     
+    def _gather(self, block_ids: List[int], size: int) -> Union[bytes, memoryview]:
+        """Return the first size bytes stored across block_ids as one bytes-like object."""
+        bs = self.superblock.block_size
+        view = self._view
+        n = len(block_ids)
+        if n and block_ids == list(range(block_ids[0], block_ids[0] + n)):
+            off = block_ids[0] * bs
+            return view[off:off + size]
+        blen = self._blen
+        return b"".join([view[b * bs:b * bs + blen[b]] for b in block_ids])
+
     def save(self, filename: str) -> None:
-        """Save the filesystem to a file."""
-        with open(filename, 'wb') as f:
-            pickle.dump({
-                'superblock': self.superblock,
-                'inodes': self.inodes,
-                'blocks': self.blocks
-            }, f)
+        """Save the filesystem to a file.
+
+        Only allocated inodes are written. The contents of their blocks are
+        concatenated in inode order into a single base64 blob; each file's
+        share of it is its size.
+        """
+        inodes = {}
+        chunks = []
+        for inode_id, inode in enumerate(self.inodes):
+            if inode is None:
+                continue
+            inodes[inode_id] = inode.to_dict()
+            if inode.blocks:
+                chunks.append(self._gather(inode.blocks, inode.size))
+
+        # json.dumps, unlike json.dump, uses the C encoder
+        image = json.dumps({
+            'superblock': self.superblock.to_dict(),
+            'inodes': inodes,
+            'data': base64.b64encode(b"".join(chunks)).decode('ascii')
+        }, separators=(',', ':'))
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(image)
     
     def load(self, filename: str) -> None:
         """Load the filesystem from a file."""
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        inodes = {int(i): Inode.from_dict(d) for i, d in data['inodes'].items()}
+        used_blocks = [b for inode in inodes.values() for b in inode.blocks]
+        self.superblock = SuperBlock.from_dict(data['superblock'], inodes, used_blocks)
+        self.inodes = [None] * self.superblock.max_inodes
+        self._init_blocks()
+
+        # Inodes come back in the order save wrote their data
+        raw = memoryview(base64.b64decode(data['data']))
+        pos = 0
+        for inode_id, inode in inodes.items():
+            self.write_inode(inode_id, inode)
+            if inode.blocks:
+                self.write_blocks(inode.blocks, raw[pos:pos + inode.size])
+                pos += inode.size
+
+    def load_legacy(self, filename: str) -> None:
+        """Load a pickled image written before the JSON format.
+
+        Old blocks held up to block_size characters, so each file's text is
+        re-encoded as UTF-8 and split into freshly allocated blocks.
+        """
         with open(filename, 'rb') as f:
-            data = pickle.load(f)
-            self.superblock = data['superblock']
-            self.inodes = data['inodes']
-            self.blocks = data['blocks']
+            data = _LegacyUnpickler(f).load()
+
+        old_sb = data['superblock']
+        old_inodes = {i: vars(inode) for i, inode in enumerate(data['inodes']) if inode is not None}
+        old_blocks = data['blocks']
+
+        geometry = {
+            'max_inodes': old_sb.max_inodes,
+            'max_blocks': old_sb.max_blocks,
+            'block_size': old_sb.block_size
+        }
+        self.superblock = SuperBlock.from_dict(geometry, old_inodes)
+        self.inodes = [None] * self.superblock.max_inodes
+        self._init_blocks()
+
+        for inode_id, old in old_inodes.items():
+            inode = Inode.from_dict(old)
+            inode.blocks = []
+            if inode.type == "file":
+                raw = "".join(old_blocks[b] for b in old['blocks']).encode('utf-8')
+                blocks_needed = (len(raw) + old_sb.block_size - 1) // old_sb.block_size
+                inode.blocks = self.superblock.alloc_blocks(blocks_needed)
+                self.write_blocks(inode.blocks, raw)
+                inode.size = len(raw)
+            self.write_inode(inode_id, inode)
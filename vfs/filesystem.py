@@ -1,5 +1,5 @@
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from inode import Inode
 from disk import Disk
 
@@ -45,24 +45,40 @@ class FileSystem:
     def __init__(self, disk: Disk):
         self.disk = disk
         self.cwd = 0  # root inode id
+        self._cwd_inode: Optional[Inode] = None  # cached inode for self.cwd
+        self._cwd_path: List[str] = []  # names from root down to cwd
+        # (path, cwd) -> inode id; cleared whenever the tree changes
+        self._resolve_memo: Dict[Tuple[str, int], int] = {}
+
+    def _cwd(self) -> Inode:
+        """Return the current directory's inode, caching it until cd/rm."""
+        if self._cwd_inode is None:
+            self._cwd_inode = self.disk.read_inode(self.cwd)
+        return self._cwd_inode
 
     def _resolve(self, path: str) -> int:
         """Resolve a path to an inode ID. Supports absolute and relative paths."""
+        key = (path, self.cwd)
+        inode_id = self._resolve_memo.get(key)
+        if inode_id is None:
+            inode_id = self._resolve_memo[key] = self._resolve_from(path, self.cwd)
+        return inode_id
+
+    def _resolve_from(self, path: str, cwd: int) -> int:
+        """Resolve a path to an inode ID starting from directory cwd."""
         if path == "/":
             return 0
 
-        parts = path.strip().split("/")
-        curr = 0 if path.startswith("/") else self.cwd
+        parts = [p for p in path.strip().split("/") if p and p != "."]
+        curr = 0 if path.startswith("/") else cwd
+        inodes = self.disk.inodes
 
         for part in parts:
-            if part in ("", "."):
-                continue
-
             if part == "..":
-                curr = self.disk.read_inode(curr).parent or 0
+                curr = inodes[curr].parent or 0
                 continue
 
-            inode = self.disk.read_inode(curr)
+            inode = inodes[curr]
             if inode.type != "dir":
                 raise NotADirectory(f"{inode.name} is not a directory")
 
@@ -75,7 +91,7 @@ class FileSystem:
 
     def mkdir(self, name: str) -> None:
         """Create a new directory in the current working directory."""
-        parent = self.disk.read_inode(self.cwd)
+        parent = self._cwd()
 
         if parent.type != "dir":
             raise NotADirectory("Current location is not a directory")
@@ -93,16 +109,17 @@ class FileSystem:
 
         inode = Inode(name, "dir", self.cwd)
 
-        parent.children[name] = inode_id
+        parent.add_child(name, inode_id)
+        self._resolve_memo.clear()
         self.disk.write_inode(inode_id, inode)
         self.disk.write_inode(self.cwd, parent)  # Write parent back
 
-    def ls(self) -> List[str]:
+    def ls(self) -> Tuple[str, ...]:
         """List contents of the current directory."""
-        inode = self.disk.read_inode(self.cwd)
+        inode = self._cwd()
         if inode.type != "dir":
             raise NotADirectory("Not a directory")
-        return list(inode.children.keys())
+        return inode.list_children()
 
     def cd(self, path: str) -> None:
         """Change the current working directory."""
@@ -112,11 +129,24 @@ class FileSystem:
         if inode.type != "dir":
             raise NotADirectory("Not a directory")
 
+        # Update the cached path by replaying the path components
+        names = [] if path.startswith("/") else self._cwd_path[:]
+        for part in path.strip().split("/"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                if names:
+                    names.pop()
+            else:
+                names.append(part)
+
         self.cwd = inode_id
+        self._cwd_inode = inode
+        self._cwd_path = names
     
     def create(self, name: str) -> None:
         """Create a new file in the current working directory."""
-        parent = self.disk.read_inode(self.cwd)
+        parent = self._cwd()
         if parent.type != "dir":
             raise NotADirectory("Not a directory")
         if "/" in name or name in ("", ".", ".."):
@@ -131,7 +161,8 @@ class FileSystem:
 
         inode = Inode(name, "file", self.cwd)
 
-        parent.children[name] = inode_id
+        parent.add_child(name, inode_id)
+        self._resolve_memo.clear()
         self.disk.write_inode(inode_id, inode)
         self.disk.write_inode(self.cwd, parent)  # Write parent back
 
@@ -144,32 +175,23 @@ class FileSystem:
             raise IsADirectory("Cannot write to a directory")
 
         # Free existing blocks
-        for b in inode.blocks:
-            self.disk.superblock.free_block(b)
+        self.disk.superblock.free_blocks_bulk(inode.blocks)
         inode.blocks.clear()
 
         # Allocate and write new blocks
         sb = self.disk.superblock
-        blocks_needed = (len(data) + sb.block_size - 1) // sb.block_size
+        raw = data.encode('utf-8')
+        blocks_needed = (len(raw) + sb.block_size - 1) // sb.block_size
         
-        if blocks_needed > sb.get_free_block_count():
+        try:
+            block_ids = sb.alloc_blocks(blocks_needed)
+        except RuntimeError:
             raise DiskFull("Not enough free blocks to write file")
-        
-        for i in range(0, len(data), sb.block_size):
-            try:
-                block = sb.alloc_block()
-            except RuntimeError:
-                # Free already allocated blocks on error
-                for b in inode.blocks:
-                    self.disk.superblock.free_block(b)
-                inode.blocks.clear()
-                raise DiskFull("No free blocks available")
-            
-            chunk = data[i:i+sb.block_size]
-            self.disk.write_block(block, chunk)
-            inode.blocks.append(block)
-
-        inode.size = len(data)
+
+        self.disk.write_blocks(block_ids, raw)
+        inode.blocks.extend(block_ids)
+
+        inode.size = len(raw)
         inode.modified = time.time()
         self.disk.write_inode(inode_id, inode)  # Write inode back after updating
 
@@ -181,20 +203,12 @@ class FileSystem:
         if inode.type != "file":
             raise IsADirectory("Cannot read a directory")
 
-        content = ""
-        for b in inode.blocks:
-            content += self.disk.read_block(b)
-        return content
+        read_block = self.disk.read_block
+        return b"".join([read_block(b) for b in inode.blocks]).decode('utf-8')
 
     def pwd(self) -> str:
         """Get the current working directory path."""
-        parts = []
-        curr = self.cwd
-        while curr != 0:
-            inode = self.disk.read_inode(curr)
-            parts.append(inode.name)
-            curr = inode.parent
-        return "/" + "/".join(reversed(parts))
+        return "/" + "/".join(self._cwd_path)
     
     def stat(self, path: str) -> dict:
         """Get file/directory statistics."""
@@ -223,27 +237,38 @@ class FileSystem:
         }
 
     def _rm_recursive(self, inode_id: int) -> None:
-        inode = self.disk.read_inode(inode_id)
+        inodes = self.disk.inodes
+        sb = self.disk.superblock
 
-        # If directory → recursively delete children
-        if inode.type == "dir":
-            for child_id in list(inode.children.values()):
-                self._rm_recursive(child_id)
+        # Collect the subtree with an explicit stack (pre-order)
+        order = []
+        stack = [inode_id]
+        while stack:
+            nid = stack.pop()
+            order.append(nid)
+            inode = inodes[nid]
+            if inode.type == "dir":
+                stack.extend(inode.children.values())
+
+        # Reversed pre-order visits every child before its parent
+        blocks = []
+        for nid in reversed(order):
+            inode = inodes[nid]
+            blocks.extend(inode.blocks)
+
+            # Remove from parent directory
+            if inode.parent is not None:
+                parent = inodes[inode.parent]
+                if parent and inode.name in parent.children:
+                    parent.remove_child(inode.name)
+                    self.disk.write_inode(inode.parent, parent)  # Write parent back
+
+            # Free inode itself
+            sb.free_inode(nid)
+            self.disk.write_inode(nid, None)
 
         # Free file blocks
-        for b in inode.blocks:
-            self.disk.superblock.free_block(b)
-
-        # Remove from parent directory
-        if inode.parent is not None:
-            parent = self.disk.read_inode(inode.parent)
-            if parent and inode.name in parent.children:
-                del parent.children[inode.name]
-                self.disk.write_inode(inode.parent, parent)  # Write parent back
-
-        # Free inode itself
-        self.disk.superblock.free_inode(inode_id)
-        self.disk.write_inode(inode_id, None)
+        sb.free_blocks_bulk(blocks)
 
     def rm(self, path: str, recursive: bool = False) -> None:
         """Remove a file or directory."""
@@ -256,16 +281,23 @@ class FileSystem:
         if inode.type == "dir" and inode.children and not recursive:
             raise DirectoryNotEmpty("Directory not empty")
 
+        self._cwd_inode = None
+        self._resolve_memo.clear()
+
         if recursive:
             self._rm_recursive(inode_id)
         else:
-            for b in inode.blocks:
-                self.disk.superblock.free_block(b)
+            self.disk.superblock.free_blocks_bulk(inode.blocks)
 
             parent = self.disk.read_inode(inode.parent)
             if parent:
-                del parent.children[inode.name]
+                parent.remove_child(inode.name)
                 self.disk.write_inode(inode.parent, parent)  # Write parent back
 
             self.disk.superblock.free_inode(inode_id)
             self.disk.write_inode(inode_id, None)
+
+        # Fall back to root if the cwd was inside the removed tree
+        if self.disk.inodes[self.cwd] is None:
+            self.cwd = 0
+            self._cwd_path = []
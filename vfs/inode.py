@@ -1,10 +1,14 @@
+import sys
 import time
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List, Tuple
 
 
 class Inode:
     """Represents a file or directory inode with metadata."""
     
+    __slots__ = ('name', 'type', 'parent', 'size', 'blocks', 'children',
+                 'created', 'modified', 'permissions', '_ls_cache')
+
     def __init__(self, name: str, inode_type: str, parent: Optional[int] = None):
         self.name = name
         self.type = inode_type      # "file" or "dir"
@@ -12,6 +16,49 @@ class Inode:
         self.size = 0
         self.blocks: List[int] = []            # data block indices
         self.children: Dict[str, int] = {}     # name -> inode id (dirs only)
+        self._ls_cache: Optional[Tuple[str, ...]] = None  # child names, reset on change
         self.created = time.time()
         self.modified = time.time()
         self.permissions = 0o755 if inode_type == "dir" else 0o644
+
+    def add_child(self, name: str, inode_id: int) -> None:
+        """Add a directory entry."""
+        self.children[sys.intern(name)] = inode_id
+        self._ls_cache = None
+
+    def remove_child(self, name: str) -> None:
+        """Remove a directory entry."""
+        del self.children[name]
+        self._ls_cache = None
+
+    def list_children(self) -> Tuple[str, ...]:
+        """Return the names of the directory entries, cached until they change."""
+        if self._ls_cache is None:
+            self._ls_cache = tuple(self.children)
+        return self._ls_cache
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the inode to a plain dict."""
+        return {
+            'name': self.name,
+            'type': self.type,
+            'parent': self.parent,
+            'size': self.size,
+            'blocks': self.blocks,
+            'children': self.children,
+            'created': self.created,
+            'modified': self.modified,
+            'permissions': self.permissions
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Inode":
+        """Rebuild an inode from a dict produced by to_dict."""
+        inode = cls(data['name'], data['type'], data['parent'])
+        inode.size = data['size']
+        inode.blocks = list(data['blocks'])
+        inode.children = {sys.intern(name): child for name, child in data['children'].items()}
+        inode.created = data['created']
+        inode.modified = data['modified']
+        inode.permissions = data['permissions']
+        return inode
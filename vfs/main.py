@@ -1,12 +1,13 @@
 import sys
 import os
 from superblock import SuperBlock
-from disk import Disk
+from disk import Disk, is_legacy_image
 from inode import Inode
 from filesystem import FileSystem
 from shell import shell
 
-DEFAULT_FS_FILE = "vfs_data.pkl"
+DEFAULT_FS_FILE = "vfs_data.json"
+LEGACY_FS_FILE = "vfs_data.pkl"  # default file name of the old pickle format
 
 
 def init_filesystem():
@@ -15,8 +16,8 @@ def init_filesystem():
     disk = Disk(sb)
 
     root = Inode("/", "dir")
-    disk.write_inode(0, root)
-    sb.free_inodes[0] = False
+    root_id = sb.alloc_inode()  # always 0 on a fresh superblock
+    disk.write_inode(root_id, root)
 
     return FileSystem(disk)
 
@@ -27,15 +28,30 @@ def load_filesystem(filename: str):
         print(f"Filesystem file '{filename}' not found. Creating new filesystem.")
         return init_filesystem()
     
-    try:
-        sb = SuperBlock()
-        disk = Disk(sb)
-        disk.load(filename)
-        return FileSystem(disk)
-    except Exception as e:
-        print(f"Error loading filesystem: {e}")
-        print("Creating new filesystem.")
-        return init_filesystem()
+    sb = SuperBlock()
+    disk = Disk(sb)
+    disk.load(filename)
+    return FileSystem(disk)
+
+
+def migrate_legacy_filesystem(filename: str) -> str:
+    """Convert an old pickle image to JSON and return the new file name.
+
+    The original file is left untouched. If it was already migrated, the
+    existing JSON image holds the newer data and is used as is.
+    """
+    target = os.path.splitext(filename)[0] + ".json"
+    if target == filename:
+        raise ValueError(f"'{filename}' is an old pickle image; rename it to .pkl to migrate it")
+    if os.path.exists(target):
+        print(f"'{filename}' is an old image that was already migrated; using '{target}'.")
+        return target
+
+    disk = Disk(SuperBlock())
+    disk.load_legacy(filename)
+    disk.save(target)
+    print(f"Migrated old filesystem image '{filename}' to '{target}' (original left unchanged).")
+    return target
 
 
 def main():
@@ -43,8 +59,19 @@ def main():
     if len(sys.argv) > 1:
         fs_file = sys.argv[1]
     
-    # Load or create filesystem
-    fs = load_filesystem(fs_file)
+    # Load or create filesystem. If an existing file can't be loaded, stop
+    # here: starting empty would overwrite it when the shell exits.
+    try:
+        if (fs_file == DEFAULT_FS_FILE and not os.path.exists(fs_file)
+                and os.path.exists(LEGACY_FS_FILE)):
+            fs_file = migrate_legacy_filesystem(LEGACY_FS_FILE)
+        elif os.path.exists(fs_file) and is_legacy_image(fs_file):
+            fs_file = migrate_legacy_filesystem(fs_file)
+        fs = load_filesystem(fs_file)
+    except Exception as e:
+        print(f"Error loading filesystem '{fs_file}': {e}")
+        print("Not starting, so the file is not overwritten.")
+        sys.exit(1)
     
     # Store filename for saving
     fs._fs_file = fs_file
@@ -1,3 +1,4 @@
+import sys
 import time
 from filesystem import FSException
 
@@ -11,11 +12,21 @@ def shell(fs):
     """Interactive shell for the virtual filesystem."""
     print("Virtual File System Shell")
     print("Type 'help' for available commands\n")
+
+    # When commands are piped in, read stdin directly instead of going
+    # through input() and printing a prompt for every line
+    interactive = sys.stdin.isatty()
+    lines = iter(sys.stdin)
     
     while True:
         try:
-            prompt = f"vfs:{fs.pwd()}$ "
-            cmd = input(prompt).strip().split()
+            if interactive:
+                line = input(f"vfs:{fs.pwd()}$ ")
+            else:
+                line = next(lines, None)
+                if line is None:
+                    raise EOFError
+            cmd = line.strip().split()
             if not cmd:
                 continue
 
@@ -40,7 +51,7 @@ def shell(fs):
                     # Join all arguments after the path as data
                     data = " ".join(cmd[2:])
                     fs.write(cmd[1], data)
-                    print(f"Written {len(data)} bytes to '{cmd[1]}'")
+                    print(f"Written {len(data.encode('utf-8'))} bytes to '{cmd[1]}'")
                 else:
                     print("Usage: write <path> <data>")
                     
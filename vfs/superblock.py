@@ -1,4 +1,5 @@
-from typing import List
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List
 
 
 class SuperBlock:
@@ -7,40 +8,113 @@ class SuperBlock:
     def __init__(self, max_inodes: int = 64, max_blocks: int = 256, block_size: int = 32):
         self.max_inodes = max_inodes
         self.max_blocks = max_blocks
-        self.free_inodes: List[bool] = [True] * max_inodes
-        self.free_blocks: List[bool] = [True] * max_blocks
+        # Bitmaps (1 = free) for O(1) membership checks, plus queues of
+        # free indices so allocation never scans the bitmap.
+        self.free_inodes = bytearray(b"\x01") * max_inodes
+        self.free_blocks = bytearray(b"\x01") * max_blocks
+        self._free_inode_q: Deque[int] = deque(range(max_inodes))
+        self._free_block_q: Deque[int] = deque(range(max_blocks))
         self.block_size = block_size
 
     def alloc_inode(self) -> int:
         """Allocate a free inode. Raises RuntimeError if none available."""
-        for i in range(self.max_inodes):
-            if self.free_inodes[i]:
-                self.free_inodes[i] = False
-                return i
-        raise RuntimeError("No free inodes available")
+        try:
+            i = self._free_inode_q.popleft()
+        except IndexError:
+            raise RuntimeError("No free inodes available")
+        self.free_inodes[i] = 0
+        return i
 
     def free_inode(self, i: int) -> None:
         """Free an inode."""
-        if 0 <= i < self.max_inodes:
-            self.free_inodes[i] = True
+        if 0 <= i < self.max_inodes and not self.free_inodes[i]:
+            self.free_inodes[i] = 1
+            self._free_inode_q.append(i)
 
     def alloc_block(self) -> int:
         """Allocate a free block. Raises RuntimeError if none available."""
-        for i in range(self.max_blocks):
-            if self.free_blocks[i]:
-                self.free_blocks[i] = False
-                return i
-        raise RuntimeError("No free blocks available")
+        try:
+            i = self._free_block_q.popleft()
+        except IndexError:
+            raise RuntimeError("No free blocks available")
+        self.free_blocks[i] = 0
+        return i
+
+    def alloc_blocks(self, n: int) -> List[int]:
+        """Allocate n free blocks at once. Raises RuntimeError if too few are available."""
+        if n > len(self._free_block_q):
+            raise RuntimeError("No free blocks available")
+        popleft = self._free_block_q.popleft
+        ids = [popleft() for _ in range(n)]
+        free_blocks = self.free_blocks
+        for i in ids:
+            free_blocks[i] = 0
+        return ids
 
     def free_block(self, i: int) -> None:
         """Free a block."""
-        if 0 <= i < self.max_blocks:
-            self.free_blocks[i] = True
+        if 0 <= i < self.max_blocks and not self.free_blocks[i]:
+            self.free_blocks[i] = 1
+            self._free_block_q.append(i)
+    
+    def free_blocks_bulk(self, ids: Iterable[int]) -> None:
+        """Free several blocks at once."""
+        free_blocks = self.free_blocks
+        append = self._free_block_q.append
+        for i in ids:
+            if 0 <= i < self.max_blocks and not free_blocks[i]:
+                free_blocks[i] = 1
+                append(i)
     
     def get_free_inode_count(self) -> int:
         """Return the number of free inodes."""
-        return sum(self.free_inodes)
+        return len(self._free_inode_q)
     
     def get_free_block_count(self) -> int:
         """Return the number of free blocks."""
-        return sum(self.free_blocks)
+        return len(self._free_block_q)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the superblock geometry to a plain dict.
+
+        The free bitmaps are not stored; from_dict rebuilds them from the
+        inodes and blocks that are in use.
+        """
+        return {
+            'max_inodes': self.max_inodes,
+            'max_blocks': self.max_blocks,
+            'block_size': self.block_size
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], used_inodes: Iterable[int] = (),
+                  used_blocks: Iterable[int] = ()) -> "SuperBlock":
+        """Rebuild a superblock from a dict, marking the given ids as allocated."""
+        # Skip __init__: its full free queues would be rebuilt straight away
+        sb = cls.__new__(cls)
+        sb.max_inodes = data['max_inodes']
+        sb.max_blocks = data['max_blocks']
+        sb.block_size = data['block_size']
+        sb.free_inodes = bytearray(b"\x01") * sb.max_inodes
+        sb.free_blocks = bytearray(b"\x01") * sb.max_blocks
+        for i in used_inodes:
+            sb.free_inodes[i] = 0
+        for i in used_blocks:
+            sb.free_blocks[i] = 0
+        sb._free_inode_q = _free_queue(sb.free_inodes)
+        sb._free_block_q = _free_queue(sb.free_blocks)
+        return sb
+
+
+def _free_queue(bitmap: bytearray) -> Deque[int]:
+    """Build a queue of free indices from a bitmap, one extend per run of free slots."""
+    q: Deque[int] = deque()
+    end = len(bitmap)
+    i = bitmap.find(1)
+    while i != -1:
+        j = bitmap.find(0, i)
+        if j == -1:
+            j = end
+        q.extend(range(i, j))
+        i = bitmap.find(1, j)
+    return q
@@ -0,0 +1,284 @@
+import contextlib
+import copyreg
+import io
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from superblock import SuperBlock
+from disk import Disk, is_legacy_image
+from inode import Inode
+from filesystem import FileSystem, FileNotFound, NotADirectory
+import main
+
+
+def make_filesystem(max_inodes: int = 64, max_blocks: int = 256, block_size: int = 32) -> FileSystem:
+    """Create an empty filesystem with the given geometry."""
+    sb = SuperBlock(max_inodes, max_blocks, block_size)
+    disk = Disk(sb)
+    disk.write_inode(sb.alloc_inode(), Inode("/", "dir"))
+    return FileSystem(disk)
+
+
+class CacheRegressionTest(unittest.TestCase):
+    """The resolve, cwd and listing caches must follow every tree change."""
+
+    def test_rm_ancestor_of_cwd_then_reuse_inode_ids(self):
+        # Four inodes: once /a/b/f is removed, every new entry reuses a freed id
+        fs = make_filesystem(max_inodes=4)
+        fs.mkdir("a")
+        fs.cd("a")
+        fs.mkdir("b")
+        fs.cd("b")
+        fs.create("f")
+        # Resolve from root so the cache holds entries keyed on the cwd rm falls back to
+        fs.cd("/")
+        old_ids = {p: fs._resolve(p) for p in ("/a", "/a/b", "/a/b/f")}
+        fs.cd("a/b")
+
+        fs.rm("/a", recursive=True)
+        self.assertEqual(fs.pwd(), "/")
+        self.assertEqual(fs.ls(), ())
+        for path in old_ids:
+            with self.assertRaises(FileNotFound):
+                fs._resolve(path)
+
+        fs.mkdir("c")
+        fs.cd("c")
+        fs.mkdir("d")
+        fs.cd("/")
+        fs.create("a")
+        self.assertEqual(
+            {fs._resolve("/c"), fs._resolve("/c/d"), fs._resolve("/a")},
+            set(old_ids.values()),
+        )
+        self.assertEqual(fs.ls(), ("c", "a"))
+        self.assertEqual(fs.stat("/a")['type'], "file")
+        with self.assertRaises(NotADirectory):
+            fs._resolve("/a/b")
+
+        fs.cd("c/d")
+        self.assertEqual(fs.pwd(), "/c/d")
+        self.assertEqual(fs.ls(), ())
+        fs.cd("..")
+        self.assertEqual(fs.pwd(), "/c")
+        self.assertEqual(fs.ls(), ("d",))
+
+    def test_relative_cd_updates_pwd(self):
+        fs = make_filesystem()
+        fs.mkdir("a")
+        fs.cd("a")
+        fs.mkdir("b")
+        fs.cd("./b/../b/.")
+        self.assertEqual(fs.pwd(), "/a/b")
+        fs.cd("../../..")
+        self.assertEqual(fs.pwd(), "/")
+        fs.cd("/a/b")
+        fs.cd("..")
+        self.assertEqual(fs.pwd(), "/a")
+
+    def test_ls_is_cached_until_the_directory_changes(self):
+        fs = make_filesystem()
+        fs.mkdir("a")
+        listing = fs.ls()
+        self.assertEqual(listing, ("a",))
+        self.assertIs(fs.ls(), listing)
+        fs.create("b")
+        self.assertEqual(fs.ls(), ("a", "b"))
+        fs.rm("a")
+        self.assertEqual(fs.ls(), ("b",))
+        fs.mkdir("c")
+        fs.cd("c")
+        fs.create("x")
+        fs.cd("/")
+        fs.rm("c", recursive=True)
+        self.assertEqual(fs.ls(), ("b",))
+
+
+class SaveLoadTest(unittest.TestCase):
+    """A saved image must load back to the same tree, data and free space."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        text = "héllo wörld, spanning several thirty-two byte blocks " * 3
+        fs = make_filesystem()
+        fs.mkdir("docs")
+        fs.cd("docs")
+        fs.create("note")
+        fs.write("note", text)
+        fs.cd("/")
+        fs.create("top")
+        fs.write("top", "abc")
+        fs.create("gone")
+        fs.write("gone", "x" * 100)
+        fs.rm("gone")
+        fs.disk.save(self.path)
+
+        disk = Disk(SuperBlock())
+        disk.load(self.path)
+        loaded = FileSystem(disk)
+        self.assertEqual(loaded.du(), fs.du())
+        self.assertEqual(loaded.ls(), ("docs", "top"))
+        self.assertEqual(loaded.read("/docs/note"), text)
+        self.assertEqual(loaded.read("top"), "abc")
+        self.assertEqual(loaded.stat("/docs/note")['size'], len(text.encode('utf-8')))
+
+        # New allocations must not reuse anything the loaded image still holds
+        loaded.create("new")
+        loaded.write("new", "y" * 200)
+        self.assertEqual(loaded.read("/docs/note"), text)
+        self.assertEqual(loaded.read("top"), "abc")
+        self.assertEqual(loaded.read("new"), "y" * 200)
+
+    def test_round_trip_fragmented_blocks(self):
+        # Eight blocks: rewriting "a" after "b" is written takes freed, non-adjacent ids
+        fs = make_filesystem(max_blocks=8, block_size=4)
+        fs.create("a")
+        fs.create("b")
+        fs.write("a", "aaaabbbbcc")
+        fs.write("b", "dddd")
+        fs.write("a", "éééé123456789")
+        blocks = fs.disk.read_inode(fs._resolve("a")).blocks
+        self.assertNotEqual(blocks, list(range(blocks[0], blocks[0] + len(blocks))))
+        fs.disk.save(self.path)
+
+        disk = Disk(SuperBlock())
+        disk.load(self.path)
+        loaded = FileSystem(disk)
+        self.assertEqual(loaded.read("a"), "éééé123456789")
+        self.assertEqual(loaded.read("b"), "dddd")
+        self.assertEqual(loaded.du(), fs.du())
+
+
+class _OldObject:
+    """An object as the pickle format stored it: a class plus its __dict__."""
+
+    def __init__(self, cls, **attrs):
+        self.cls = cls
+        self.attrs = attrs
+
+    @property
+    def __class__(self):
+        return self.cls
+
+
+class _OldImagePickler(pickle.Pickler):
+    """Writes _OldObject the way pickle wrote the original SuperBlock/Inode."""
+
+    def reducer_override(self, obj):
+        if isinstance(obj, _OldObject):
+            return copyreg.__newobj__, (obj.cls,), obj.attrs
+        return NotImplemented
+
+
+def old_inode(name, inode_type, parent=None, blocks=(), children=None, size=0):
+    return _OldObject(Inode, name=name, type=inode_type, parent=parent, size=size,
+                      blocks=list(blocks), children=dict(children or {}),
+                      created=1.0, modified=2.0,
+                      permissions=0o755 if inode_type == "dir" else 0o644)
+
+
+def write_old_image(path):
+    """Write a pickle image shaped like the ones the original code saved.
+
+    Old blocks held up to block_size characters, so "héllo wörld" took three
+    4-character blocks but is 13 bytes once encoded as UTF-8.
+    """
+    blocks = ["héll", "o wö", "rld", "abc"] + [""] * 12
+    free_blocks = [False] * 4 + [True] * 12
+    inodes = [
+        old_inode("/", "dir", children={"docs": 1, "top": 3}),
+        old_inode("docs", "dir", parent=0, children={"nöte": 2}),
+        old_inode("nöte", "file", parent=1, blocks=[0, 1, 2], size=11),
+        old_inode("top", "file", parent=0, blocks=[3], size=3),
+    ] + [None] * 4
+    superblock = _OldObject(SuperBlock, max_inodes=8, max_blocks=16, block_size=4,
+                            free_inodes=[False] * 4 + [True] * 4, free_blocks=free_blocks)
+    with open(path, 'wb') as f:
+        _OldImagePickler(f).dump({'superblock': superblock, 'inodes': inodes, 'blocks': blocks})
+
+
+class LegacyImageTest(unittest.TestCase):
+    """Pickle images from before the JSON format are migrated, never lost."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.pkl = os.path.join(self.dir, "fs.pkl")
+        self.json = os.path.join(self.dir, "fs.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_load_legacy(self):
+        write_old_image(self.pkl)
+        self.assertTrue(is_legacy_image(self.pkl))
+
+        disk = Disk(SuperBlock())
+        disk.load_legacy(self.pkl)
+        fs = FileSystem(disk)
+        self.assertEqual(fs.ls(), ("docs", "top"))
+        self.assertEqual(fs.read("/docs/nöte"), "héllo wörld")
+        self.assertEqual(fs.read("top"), "abc")
+        stats = fs.stat("/docs/nöte")
+        self.assertEqual(stats['size'], 13)
+        self.assertEqual(stats['blocks'], 4)
+        self.assertEqual(stats['permissions'], oct(0o644))
+        usage = fs.du()
+        self.assertEqual((usage['used_inodes'], usage['free_inodes']), (4, 4))
+        self.assertEqual((usage['used_blocks'], usage['free_blocks']), (5, 11))
+
+    def test_unexpected_class_is_rejected(self):
+        for payload in ({'superblock': os.system}, {'superblock': mock.Mock}):
+            with open(self.pkl, 'wb') as f:
+                pickle.dump(payload, f)
+            with self.assertRaises(pickle.UnpicklingError):
+                Disk(SuperBlock()).load_legacy(self.pkl)
+
+    def test_migrate_once_then_keep_using_json(self):
+        write_old_image(self.pkl)
+        with open(self.pkl, 'rb') as f:
+            original = f.read()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            target = main.migrate_legacy_filesystem(self.pkl)
+        self.assertEqual(target, self.json)
+        self.assertFalse(is_legacy_image(self.json))
+        with open(self.pkl, 'rb') as f:
+            self.assertEqual(f.read(), original)
+
+        # Changes saved to the JSON image must survive a second run on the .pkl
+        fs = main.load_filesystem(target)
+        fs.create("new")
+        fs.disk.save(target)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main.migrate_legacy_filesystem(self.pkl), self.json)
+        self.assertIn("already migrated", out.getvalue())
+        self.assertEqual(main.load_filesystem(self.json).ls(), ("docs", "top", "new"))
+
+    def test_unreadable_image_is_not_overwritten(self):
+        bad = os.path.join(self.dir, "bad.json")
+        with open(bad, 'w') as f:
+            f.write("garbage")
+        with mock.patch.object(sys, 'argv', ["main.py", bad]), \
+                mock.patch.object(main, 'shell') as shell, \
+                contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(SystemExit) as cm:
+                main.main()
+        self.assertEqual(cm.exception.code, 1)
+        shell.assert_not_called()
+        with open(bad) as f:
+            self.assertEqual(f.read(), "garbage")
+
+
+if __name__ == "__main__":
+    unittest.main()